@@ -1,71 +1,312 @@
 import subprocess
-import re
 import argparse
 import sys
+import shlex
+import os
+import json
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 
-def get_android_devices(verbose=False):
-    """Gets connected Android devices and their audio forwarding potential."""
+# Resolve the executables once, so that spawning them skips the PATH search
+_ADB = shutil.which('adb')
+_SCRCPY = shutil.which('scrcpy')
+
+
+def _parse_device_lines(lines):
+    """Parses `adb devices -l` output lines into (serial, full_info) pairs."""
+    for line in lines:
+        # Lines are "<serial> <state> [<details>]"; only keep ready devices.
+        # This also skips the header, blank lines and "* daemon ..." messages.
+        parts = line.split(None, 2)
+        if len(parts) >= 2 and parts[1] == 'device':
+            yield parts[0], line.strip()
+
+
+def _iter_listed_devices():
+    """Yields (serial, full_info) for each ready device as `adb devices -l` prints it."""
+    with subprocess.Popen([_ADB, 'devices', '-l'], stdout=subprocess.PIPE, encoding='utf-8', bufsize=1) as proc:
+        yield from _parse_device_lines(proc.stdout)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+
+# Properties read from each device
+_DEVICE_PROPS = ('ro.build.version.sdk', 'ro.product.model', 'ro.product.cpu.abi')
+_QUERY_TIMEOUT = 10  # Seconds before an unresponsive device is given up on
+_AUDIO_MIN_SDK = 30  # Audio forwarding requires Android 11
+
+
+@dataclass(frozen=True, slots=True)
+class Device:
+    """A connected device and its static properties."""
+    serial: str
+    full_info: str
+    sdk_version: int
+    model: str
+    abi: str
+
+    @property
+    def audio_possible(self):
+        """Whether the device is recent enough for audio forwarding."""
+        return self.sdk_version >= _AUDIO_MIN_SDK
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceTable:
+    """Connected devices stored column-wise, one tuple per attribute."""
+    serials: tuple = ()
+    full_infos: tuple = ()
+    sdk_versions: tuple = ()
+    models: tuple = ()
+    abis: tuple = ()
+    audio_flags: tuple = ()
+
+    def __len__(self):
+        return len(self.serials)
+
+
+def _query_props(serial):
+    """Queries device properties in a single adb shell. Returns (serial, props)."""
+    output = subprocess.check_output(
+        [_ADB, '-s', serial, 'shell', '; '.join(f'echo "{prop}=$(getprop {prop})"' for prop in _DEVICE_PROPS)],
+        encoding='utf-8', timeout=_QUERY_TIMEOUT
+    )
+    # Tag each value with its property rather than relying on line order
+    props = dict.fromkeys(_DEVICE_PROPS, '')
+    for line in output.splitlines():
+        prop, sep, value = line.partition('=')
+        if sep and prop in props:
+            props[prop] = value.strip()
+    props['ro.build.version.sdk'] = int(props['ro.build.version.sdk'])
+    return serial, props
+
+
+# Device properties rarely change, so they are cached across runs
+_CACHE_PATH = os.path.expanduser('~/.cache/scrcpy-opts/sdk.json')
+_CACHE_MAX_AGE = 24 * 60 * 60  # Re-query daily, e.g. to notice OS updates
+# Tokens of the `adb devices -l` line that must match for a cache hit
+_IDENTITY_KEYS = ('product', 'model', 'device')
+
+
+def _load_cache():
+    """Loads the cached device properties, keyed by serial."""
+    try:
+        with open(_CACHE_PATH, encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_cache_entry_valid(entry, now):
+    """Checks that a cache entry is well-formed and was queried recently enough."""
     try:
-        devices = []
-        adb_output = subprocess.check_output(['adb', 'devices', '-l']).decode('utf-8')
-        for line in adb_output.splitlines()[1:]:
-            if line.strip() and not line.startswith('*'):
-                match = re.match(r'([\w\d]+)\s+device(.*)', line)
-                if match:
-                    serial = match.group(1)
-                    try:
-                        sdk_version = int(subprocess.check_output(
-                            ['adb', '-s', serial, 'shell', 'getprop', 'ro.build.version.sdk']
-                        ).decode('utf-8').strip())
-                        audio_possible = sdk_version >= 30
-                        devices.append({
-                            'serial': serial,
-                            'audio_possible': audio_possible,
-                            'full_info': line.strip(),
-                            'sdk_version': sdk_version
-                        })
-                    except (subprocess.CalledProcessError, ValueError) as e:
-                        if verbose:
-                            print(f"Error getting SDK version for {serial}: {e}", file=sys.stderr) # Verbose error to stderr
-        return devices
-    except FileNotFoundError:
+        return (now - entry['queried'] < _CACHE_MAX_AGE
+                and isinstance(entry['identity'], dict)
+                and all(prop in entry['props'] for prop in _DEVICE_PROPS))
+    except (KeyError, TypeError):
+        return False
+
+
+def _is_cacheable(serial):
+    """Emulator and wireless (host:port) serials are reused by different devices."""
+    return not serial.startswith('emulator-') and ':' not in serial
+
+
+def _listing_identity(full_info):
+    """Extracts the product/model/device tokens of an `adb devices -l` line."""
+    tokens = dict(token.split(':', 1) for token in full_info.split()[2:] if ':' in token)
+    return {key: tokens.get(key, '') for key in _IDENTITY_KEYS}
+
+
+def _cached_props(cache, serial, full_info):
+    """Returns the cached properties of a device, or None on a miss."""
+    entry = cache.get(serial)
+    if entry is None or entry['identity'] != _listing_identity(full_info):
+        return None
+    return entry['props']
+
+
+def _cache_entry(props, full_info, now):
+    """Builds the cache entry for freshly queried properties."""
+    return {'props': props, 'identity': _listing_identity(full_info), 'queried': now}
+
+
+def _save_cache(cache, verbose=False):
+    """Atomically writes the device properties cache."""
+    cache_dir = os.path.dirname(_CACHE_PATH)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # A unique temporary file, so that concurrent runs do not clobber it
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir, suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            json.dump(cache, f)
+        os.replace(tmp_path, _CACHE_PATH)
+    except OSError as e:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        if verbose:
+            print(f"Error writing cache {_CACHE_PATH}: {e}", file=sys.stderr) # Verbose error to stderr
+
+
+def _load_valid_cache(now):
+    """Loads the device properties cache, dropping stale or malformed entries."""
+    return {serial: entry for serial, entry in _load_cache().items()
+            if _is_cache_entry_valid(entry, now)}
+
+
+def _adb_available():
+    """Checks that adb was found, reporting it otherwise."""
+    if _ADB is None:
         print("Error: adb not found. Make sure it's in your PATH.", file=sys.stderr) # Error to stderr
-        return []
+        return False
+    return True
+
+
+def list_serials() -> dict[str, str] | None:
+    """Lists connected devices without querying them. Returns {serial: full_info}.
+
+    Returns None if adb could not be run; the error has been reported.
+    """
+    if not _adb_available():
+        return None
+    try:
+        return dict(_iter_listed_devices())
+    except subprocess.CalledProcessError as e:
+        print(f"Error communicating with adb: {e}", file=sys.stderr) # Error to stderr
+        return None
+
+
+def query_device(serial, full_info='', verbose=False) -> Device | None:
+    """Gets the properties of a single device, from the cache if possible."""
+    now = int(time.time())
+    cache = _load_valid_cache(now)
+    props = _cached_props(cache, serial, full_info)
+    if props is None:
+        try:
+            _, props = _query_props(serial)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError) as e:
+            print(f"Error getting SDK version for {serial}: {e}", file=sys.stderr) # Error to stderr
+            return None
+        if _is_cacheable(serial):
+            cache[serial] = _cache_entry(props, full_info, now)
+            _save_cache(cache, verbose)
+    return Device(
+        serial=serial,
+        full_info=full_info,
+        sdk_version=props['ro.build.version.sdk'],
+        model=props['ro.product.model'],
+        abi=props['ro.product.cpu.abi']
+    )
+
+
+def get_android_devices(verbose=False) -> DeviceTable:
+    """Gets connected Android devices and their audio forwarding potential."""
+    if not _adb_available():
+        return DeviceTable()
+    try:
+        now = int(time.time())
+        cache = _load_valid_cache(now)
+        parsed = []
+        device_props = {}
+        futures = {}
+        # The adb round-trips are IO-bound, so query all devices concurrently,
+        # starting each query as soon as adb lists the device
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            for serial, full_info in _iter_listed_devices():
+                parsed.append((serial, full_info))
+                props = _cached_props(cache, serial, full_info)
+                if props is not None:
+                    device_props[serial] = props
+                else:
+                    futures[executor.submit(_query_props, serial)] = serial, full_info
+            for future in as_completed(futures):
+                serial, full_info = futures[future]
+                try:
+                    _, props = future.result()
+                    device_props[serial] = props
+                    if _is_cacheable(serial):
+                        cache[serial] = _cache_entry(props, full_info, now)
+                except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError) as e:
+                    if verbose:
+                        print(f"Error getting SDK version for {serial}: {e}", file=sys.stderr) # Verbose error to stderr
+        if not parsed:
+            return DeviceTable()
+        if futures:
+            _save_cache(cache, verbose)
+        # Keep the `adb devices` ordering regardless of completion order
+        rows = [(serial, full_info, device_props[serial]) for serial, full_info in parsed
+                if serial in device_props]
+        sdk_versions = tuple(props['ro.build.version.sdk'] for _, _, props in rows)
+        return DeviceTable(
+            serials=tuple(serial for serial, _, _ in rows),
+            full_infos=tuple(full_info for _, full_info, _ in rows),
+            sdk_versions=sdk_versions,
+            models=tuple(props['ro.product.model'] for _, _, props in rows),
+            abis=tuple(props['ro.product.cpu.abi'] for _, _, props in rows),
+            audio_flags=tuple(sdk_version >= _AUDIO_MIN_SDK for sdk_version in sdk_versions)
+        )
     except subprocess.CalledProcessError as e:
         print(f"Error communicating with adb: {e}", file=sys.stderr) # Error to stderr
-        return []
+        return DeviceTable()
 
 
 def launch_scrcpy(serial, video_codec=None, max_size=None, max_fps=None, audio=True, keyboard_mode="default", verbose=False):
-    """Launches scrcpy with specified options."""
-    command = ['scrcpy', '-s', serial]
+    """Launches scrcpy with specified options.
 
-    if video_codec:
-        command.extend(['--video-codec', video_codec])
-    if max_size:
-        command.extend(['-m', str(max_size)])
-    if max_fps:
-        command.extend(['--max-fps', str(max_fps)])
-    if not audio:
-        command.append('--no-audio')
-    if keyboard_mode == "uhid":
-        command.append("--keyboard=uhid")
+    On POSIX systems the Python process image is replaced by scrcpy, so this
+    only returns if scrcpy could not be started. Returns the exit status.
+    """
+    if _SCRCPY is None:
+        print("Error: scrcpy not found. Make sure it's installed and in your PATH.", file=sys.stderr)
+        return 1
 
+    # Options taking a value, and flags, each passed only when set
+    value_options = (
+        ('--video-codec', video_codec),
+        ('-m', max_size),
+        ('--max-fps', max_fps),
+    )
+    flags = (
+        ('--no-audio', not audio),
+        ('--keyboard=uhid', keyboard_mode == "uhid"),
+    )
+    command = [_SCRCPY, '-s', serial,
+               *(arg for option, value in value_options if value for arg in (option, str(value))),
+               *(flag for flag, enabled in flags if enabled)]
 
     if verbose:
-      print(f"Running command: {' '.join(command)}") # Verbose command echo
+      print("Running command:", shlex.join(command)) # Verbose command echo, shell-quoted
 
     try:
-        subprocess.run(command, check=True)
-    except FileNotFoundError:
-        print("Error: scrcpy not found. Make sure it's installed and in your PATH.", file=sys.stderr)
+        if os.name == 'nt':
+            # os.exec*() on Windows spawns a new process and exits immediately,
+            # which would hand the console back while scrcpy is still running
+            subprocess.run(command, check=True)
+        else:
+            # Nothing is left to do after scrcpy returns, so do not keep the
+            # interpreter around; flush first, exec discards pending output
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.execv(command[0], command)
     except subprocess.CalledProcessError as e:
         print(f"Error running scrcpy: {e}", file=sys.stderr)
+        return e.returncode
+    except OSError as e:
+        print(f"Error starting scrcpy: {e}", file=sys.stderr)
+        return 1
+    return 0
 
 
-if __name__ == "__main__":
-    import sys
-
+def main():
+    """Parses the command line and lists devices or launches scrcpy."""
     parser = argparse.ArgumentParser(description="Launch scrcpy with options.")
     parser.add_argument("-s", "--serial", help="Serial number of the target device.")
     parser.add_argument("-v", "--video-codec", help="Video codec (e.g., h264, vp8).")
@@ -81,27 +322,41 @@ if __name__ == "__main__":
     if args.list_devices:
         devices = get_android_devices(args.verbose)
         if devices:
-            for device in devices:
-                print(f"Device: {device['full_info']}")
-                print(f"  Serial: {device['serial']}")
-                print(f"  SDK Version: {device['sdk_version']}")
-                print(f"  Audio Forwarding Possible: {'Yes' if device['audio_possible'] else 'No'}")
+            for full_info, serial, model, abi, sdk_version, audio_possible in zip(
+                    devices.full_infos, devices.serials, devices.models, devices.abis,
+                    devices.sdk_versions, devices.audio_flags):
+                print(f"Device: {full_info}")
+                print(f"  Serial: {serial}")
+                print(f"  Model: {model}")
+                print(f"  ABI: {abi}")
+                print(f"  SDK Version: {sdk_version}")
+                print(f"  Audio Forwarding Possible: {'Yes' if audio_possible else 'No'}")
                 print("-" * 20)
         else:
             print("No devices found.")
-        exit(0)
+        # Listing is all that was asked for: skip the launch path entirely
+        return 0
 
     if not args.serial:
         print("Error: Serial number (-s) is required unless --list-devices is used.")
         parser.print_help()
-        exit(1)
+        return 1
 
-    devices = get_android_devices(args.verbose)
+    serials = list_serials()
+    if serials is None:
+        return 1
+    if args.serial not in serials:
+        print(f"Error: Device {args.serial} not found.", file=sys.stderr)
+        return 1
 
-    if devices:
-      if args.verbose:
-          for device in devices:
-              print(f"Found device: {device['full_info']} (Audio: {'Possible' if device['audio_possible'] else 'Not Possible'})")
-      launch_scrcpy(args.serial, args.video_codec, args.max_size, args.max_fps, not args.no_audio, args.keyboard_mode, args.verbose)
-    else:
-        exit(1)
+    # The properties are only reported, so only query them when verbose, and
+    # launch regardless of whether the query succeeds
+    if args.verbose:
+        device = query_device(args.serial, serials[args.serial], args.verbose)
+        if device is not None:
+            print(f"Found device: {device.full_info} (Audio: {'Possible' if device.audio_possible else 'Not Possible'})")
+    return launch_scrcpy(args.serial, args.video_codec, args.max_size, args.max_fps, not args.no_audio, args.keyboard_mode, args.verbose)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+#!/bin/bash
+# Build opts_list.py as a standalone native executable with Nuitka, so that
+# launching it does not pay the Python interpreter startup cost.
+#
+# This is a manual, opt-in build: it is not run by release.sh nor packaged
+# with the release; `python3 opts_list.py` remains the supported entry point.
+#
+# Requires: python3 -m pip install nuitka
+set -ex
+cd "$(dirname ${BASH_SOURCE[0]})"
+. build_common
+cd .. # root project dir
+
+PYTHON="${PYTHON:-python3}"
+OPTS_LIST_BUILD_DIR="$WORK_DIR/build-opts-list"
+
+rm -rf "$OPTS_LIST_BUILD_DIR"
+mkdir -p "$OPTS_LIST_BUILD_DIR"
+"$PYTHON" -m nuitka --standalone --onefile \
+    --output-dir="$OPTS_LIST_BUILD_DIR" \
+    --output-filename=scrcpy-opts \
+    opts_list.py